@@ -5,6 +5,7 @@ from src.document_processor import DocumentProcessor
 from src.vector_store import VectorStore
 from src.chat_agent import ChatAgent
 from src.config import Config
+from src.async_runner import iter_sync
 import time
 
 # Load environment variables
@@ -20,6 +21,22 @@ def initialize_session_state():
         st.session_state.chat_history = []
     if 'documents_ingested' not in st.session_state:
         st.session_state.documents_ingested = False
+    
+    # Pick up the last ingested corpus instead of asking for a re-ingest. The
+    # index directory is shared, so this would hand one visitor's documents
+    # to everyone on a multi-user deployment - it is opt-in
+    if st.session_state.vector_store is None and Config.RELOAD_LAST_INDEX:
+        vector_store = load_persisted_store()
+        if vector_store is not None:
+            st.session_state.vector_store = vector_store
+            st.session_state.chat_agent = ChatAgent(vector_store)
+            st.session_state.documents_ingested = True
+
+@st.cache_resource
+def load_persisted_store():
+    """Load the vector store saved by the last ingest, shared across reruns and sessions"""
+    vector_store = VectorStore()
+    return vector_store if vector_store.load() else None
 
 def main():
     st.set_page_config(
@@ -107,27 +124,25 @@ def main():
         # Display chat history
         chat_container = st.container()
         with chat_container:
-            for i, (q, a) in enumerate(st.session_state.chat_history):
-                st.markdown(f"**You:** {q}")
-                st.markdown(f"**Agent:** {a}")
-                st.markdown("---")
+            for q, a in st.session_state.chat_history:
+                with st.chat_message("user"):
+                    st.markdown(q)
+                with st.chat_message("assistant"):
+                    st.markdown(a)
         
         # Chat input
         if st.session_state.documents_ingested:
-            question = st.text_input(
-                "Ask me anything about the candidate:",
-                value=getattr(st.session_state, 'current_question', ''),
-                key="question_input"
-            )
+            prompt = st.chat_input("Ask me anything about the candidate...")
+            question = prompt or st.session_state.pop('current_question', None)
             
-            if st.button("Send", type="primary") or question:
-                if question.strip():
-                    with st.spinner("Thinking..."):
-                        response = get_agent_response(question, mode)
-                        st.session_state.chat_history.append((question, response))
-                        if hasattr(st.session_state, 'current_question'):
-                            delattr(st.session_state, 'current_question')
-                        st.experimental_rerun()
+            if question:
+                # Append only the new turn; chat_input already triggers the rerun
+                with chat_container:
+                    with st.chat_message("user"):
+                        st.markdown(question)
+                    with st.chat_message("assistant"):
+                        response = st.write_stream(stream_agent_response(question, mode))
+                st.session_state.chat_history.append((question, response))
         else:
             st.info("Please upload and process documents first to start chatting.")
     
@@ -141,7 +156,10 @@ def main():
         st.header("🔧 System Info")
         st.text(f"OpenAI API: {'✅' if os.getenv('OPENAI_API_KEY') else '❌'}")
         st.text(f"Model: {Config.OPENAI_MODEL}")
-        st.text(f"Embedding: {Config.EMBEDDING_MODEL}")
+        if Config.EMBEDDING_BACKEND == "local":
+            st.text(f"Embedding: {Config.LOCAL_EMBEDDING_MODEL} (local)")
+        else:
+            st.text(f"Embedding: {Config.EMBEDDING_MODEL}")
 
 def process_documents(uploaded_files):
     """Process uploaded documents and create vector store"""
@@ -150,20 +168,15 @@ def process_documents(uploaded_files):
             # Initialize processor
             processor = DocumentProcessor()
             
-            # Save uploaded files temporarily
-            temp_files = []
-            for uploaded_file in uploaded_files:
-                temp_path = f"temp_{uploaded_file.name}"
-                with open(temp_path, "wb") as f:
-                    f.write(uploaded_file.getvalue())
-                temp_files.append(temp_path)
-            
-            # Process documents
-            chunks = processor.process_documents(temp_files)
+            # Process documents straight from the in-memory uploads
+            chunks = processor.process_files(
+                [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+            )
             
             # Create vector store
             vector_store = VectorStore()
             vector_store.add_chunks(chunks)
+            load_persisted_store.clear()
             
             # Initialize chat agent
             chat_agent = ChatAgent(vector_store)
@@ -173,25 +186,20 @@ def process_documents(uploaded_files):
             st.session_state.chat_agent = chat_agent
             st.session_state.documents_ingested = True
             
-            # Clean up temp files
-            for temp_file in temp_files:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            
             st.success(f"✅ Successfully processed {len(uploaded_files)} documents with {len(chunks)} chunks!")
             
         except Exception as e:
             st.error(f"Error processing documents: {str(e)}")
 
-def get_agent_response(question, mode):
-    """Get response from chat agent"""
+def stream_agent_response(question, mode):
+    """Stream response tokens from chat agent"""
     try:
         if st.session_state.chat_agent:
-            return st.session_state.chat_agent.get_response(question, mode)
+            yield from iter_sync(st.session_state.chat_agent.stream_response(question, mode))
         else:
-            return "Please upload and process documents first."
+            yield "Please upload and process documents first."
     except Exception as e:
-        return f"Error generating response: {str(e)}"
+        yield f"Error generating response: {str(e)}"
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) the background event loop shared by all async API clients"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="codex-agent-loop", daemon=True)
+            thread.start()
+    return _loop
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared event loop and block until it finishes.
+
+    Streamlit reruns the script on a fresh thread each time, so a single
+    long-lived loop keeps AsyncOpenAI connection pools valid across reruns
+    where repeated asyncio.run() calls would not.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+def iter_sync(aiterator: AsyncIterator[T]) -> Iterator[T]:
+    """Consume an async iterator from sync code, pulling each item on the shared loop"""
+    async def next_item() -> T:
+        return await aiterator.__anext__()
+    
+    while True:
+        try:
+            yield run_sync(next_item())
+        except StopAsyncIteration:
+            return
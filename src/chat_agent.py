@@ -1,15 +1,35 @@
-from openai import OpenAI
-from typing import List, Dict
+import asyncio
+from openai import AsyncOpenAI
+from typing import AsyncIterator, List, Dict
 from src.vector_store import VectorStore
-from src.config import Config
+from src.config import CONFIG
+
+# Kept free of per-request data so the prompt prefix is identical across turns
+# and the backend's prompt caching can reuse it; only the mode fields vary
+SYSTEM_PROMPT = """You are a personal AI agent representing a job candidate based on their provided documents.
+
+RESPONSE MODE: {mode}
+Style: {style}
+Instruction: {instruction}
+
+GUIDELINES:
+1. Answer questions about the candidate using ONLY the context provided with each question
+2. Speak in first person as if you ARE the candidate
+3. Reference specific experiences, projects, or skills mentioned in the documents
+4. If information is not in the context, say so honestly
+5. Match the requested response style and tone
+6. Be authentic and true to what's in the documents
+
+Remember: You are answering AS the candidate, not ABOUT the candidate."""
 
 class ChatAgent:
     """Chat agent that uses RAG to answer questions about the candidate"""
     
     def __init__(self, vector_store: VectorStore):
         self.vector_store = vector_store
-        self.config = Config()
-        self.client = OpenAI(api_key=self.config.OPENAI_API_KEY)
+        self.config = CONFIG
+        self.aclient = AsyncOpenAI(api_key=self.config.OPENAI_API_KEY)
+        self._semaphore = None  # created lazily on the event loop that uses it
         
         # Mode-specific prompts
         self.mode_prompts = {
@@ -31,14 +51,26 @@ class ChatAgent:
             }
         }
     
-    def get_response(self, question: str, mode: str = "interview") -> str:
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Bound the number of in-flight chat completions for this agent"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.config.MAX_CONCURRENT_REQUESTS)
+        return self._semaphore
+    
+    async def get_response(self, question: str, mode: str = "interview") -> str:
         """Generate a response to a question using RAG"""
+        parts = [token async for token in self.stream_response(question, mode)]
+        return "".join(parts).strip()
+    
+    async def stream_response(self, question: str, mode: str = "interview") -> AsyncIterator[str]:
+        """Generate a response to a question using RAG, yielding tokens as they arrive"""
         try:
             # Retrieve relevant context
-            search_results = self.vector_store.search(question, top_k=5)
+            search_results = await self.vector_store.asearch(question, top_k=5)
             
             if not search_results:
-                return "I don't have enough information in the provided documents to answer that question."
+                yield "I don't have enough information in the provided documents to answer that question."
+                return
             
             # Build context from retrieved chunks
             context_chunks = []
@@ -49,16 +81,15 @@ class ChatAgent:
                     'score': score
                 })
             
-            # Generate response using LLM
-            response = self._generate_llm_response(question, context_chunks, mode)
-            
-            return response
+            # Stream response from LLM
+            async for token in self._generate_llm_response(question, context_chunks, mode):
+                yield token
             
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            yield f"Error generating response: {str(e)}"
     
-    def _generate_llm_response(self, question: str, context_chunks: List[Dict], mode: str) -> str:
-        """Generate response using OpenAI LLM"""
+    async def _generate_llm_response(self, question: str, context_chunks: List[Dict], mode: str) -> AsyncIterator[str]:
+        """Stream response tokens from OpenAI LLM"""
         
         # Build context string
         context_str = ""
@@ -71,45 +102,39 @@ class ChatAgent:
         mode_config = self.mode_prompts.get(mode, self.mode_prompts["interview"])
         
         # Build system prompt
-        system_prompt = f"""You are a personal AI agent representing a job candidate based on their provided documents.
-
-RESPONSE MODE: {mode.upper()}
-Style: {mode_config['style']}
-Instruction: {mode_config['instruction']}
-
-GUIDELINES:
-1. Answer questions about the candidate using ONLY the provided context
-2. Speak in first person as if you ARE the candidate
-3. Reference specific experiences, projects, or skills mentioned in the documents
-4. If information is not in the context, say so honestly
-5. Match the requested response style and tone
-6. Be authentic and true to what's in the documents
-
-CONTEXT FROM CANDIDATE'S DOCUMENTS:
+        system_prompt = SYSTEM_PROMPT.format(
+            mode=mode.upper(),
+            style=mode_config['style'],
+            instruction=mode_config['instruction']
+        )
+        
+        # Build user prompt - retrieved context varies per question, so it goes here
+        user_prompt = f"""CONTEXT FROM CANDIDATE'S DOCUMENTS:
 {context_str}
 
-Remember: You are answering AS the candidate, not ABOUT the candidate."""
-
-        # Build user prompt
-        user_prompt = f"Question: {question}"
+Question: {question}"""
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
-            
-            return response.choices[0].message.content.strip()
+            async with self._get_semaphore():
+                response = await self.aclient.chat.completions.create(
+                    model=self.config.OPENAI_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=800,
+                    stream=True
+                )
+                
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
             
         except Exception as e:
-            return f"Error calling OpenAI API: {str(e)}"
+            yield f"Error calling OpenAI API: {str(e)}"
     
-    def get_self_reflection(self, topic: str) -> str:
+    async def get_self_reflection(self, topic: str) -> str:
         """Generate self-reflective responses about working style, growth areas, etc."""
         reflection_prompt = f"""Based on the candidate's documents, provide a thoughtful self-reflection on: {topic}
 
@@ -121,4 +146,4 @@ Consider:
 
 Be honest, insightful, and authentic to what the documents reveal."""
         
-        return self.get_response(reflection_prompt, mode="story")
\ No newline at end of file
+        return await self.get_response(reflection_prompt, mode="story")
\ No newline at end of file
@@ -1,13 +1,18 @@
 import os
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(frozen=True)
 class Config:
     # OpenAI Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL: str = "gpt-3.5-turbo"
     EMBEDDING_MODEL: str = "text-embedding-3-small"
     
+    # Embedding Backend - "local" runs sentence-transformers in-process, "openai" calls the API
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "local")
+    LOCAL_EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    LOCAL_EMBEDDING_BATCH_SIZE: int = 64
+    
     # Chunking Configuration - using character-based for LangChain
     CHUNK_SIZE: int = 1000  # characters for LangChain splitter
     CHUNK_OVERLAP: int = 200  # character overlap
@@ -15,17 +20,38 @@ class Config:
     # RAG Configuration
     TOP_K_RESULTS: int = 5
     SIMILARITY_THRESHOLD: float = 0.7
+    QUERY_CACHE_SIZE: int = 1024  # query embeddings kept in the LRU cache
+    QUERY_BATCH_WINDOW: float = 0.01  # seconds concurrent searches wait to share one index pass
     
     # Vector Store Configuration
-    VECTOR_DIM: int = 1536  # dimension for text-embedding-3-small
+    VECTOR_DIM: int = 384 if EMBEDDING_BACKEND == "local" else 512  # all-MiniLM-L6-v2 / text-embedding-3-small (API-truncated)
+    EMBEDDING_BATCH_SIZE: int = 2048  # max texts per embeddings API call (API limit)
+    EMBEDDING_BATCH_TOKENS: int = 100_000  # token budget per embeddings API call (API limit 300k)
+    VECTOR_ENCODING: str = "SQfp16"  # FAISS vector storage: "Flat" (fp32), "SQfp16" or "SQ8"
+    IVF_VECTOR_ENCODING: str = "SQ8"  # storage for IVF-sized corpora, 1 byte per dimension
+    INDEX_DIR: str = os.path.expanduser("~/.cache/codex-agent/index")  # persisted index + chunks, one subdirectory per corpus
+    # Attach the last ingested corpus to every new session - single-user deployments only
+    RELOAD_LAST_INDEX: bool = os.getenv("RELOAD_LAST_INDEX", "false").lower() == "true"
+    IVF_MIN_VECTORS: int = 10_000  # switch from exact to approximate (HNSW / IVF) search above this size
+    TRAINING_SAMPLE_SIZE: int = 100_000  # vectors embedded up front to train quantizers / IVF
+    PQ_MIN_VECTORS: int = 1_000_000  # switch IVF storage to product quantization above this size
+    IVF_NPROBE: int = 16  # clusters scanned per query
+    USE_HNSW: bool = True  # HNSW graph for mid-size corpora and as the IVF coarse quantizer
+    HNSW_M: int = 32  # graph neighbours per vector
+    HNSW_EF_CONSTRUCTION: int = 200  # candidate list while building, higher = better graph
+    HNSW_EF_SEARCH: int = 64  # candidate list per query, trades latency for recall
+    USE_GPU: bool = True  # copy indexes to CUDA devices when a GPU build of FAISS finds any
+    
+    # Concurrency Configuration
+    MAX_CONCURRENT_REQUESTS: int = 32  # in-flight OpenAI requests per client
+    EMBEDDING_CONCURRENCY: int = 8  # in-flight embedding batches during ingest
     
     # File Processing
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
-    SUPPORTED_EXTENSIONS: list = None
-    
-    def __post_init__(self):
-        if self.SUPPORTED_EXTENSIONS is None:
-            self.SUPPORTED_EXTENSIONS = ['.pdf', '.txt', '.md']  # Removed .docx
+    CHUNK_CACHE_DIR: str = os.path.expanduser("~/.cache/codex-agent/chunks")
+    OCR_MIN_PAGE_CHARS: int = 20  # pages with less extracted text are OCR'd
+    OCR_RENDER_DPI: int = 300
+    SUPPORTED_EXTENSIONS: tuple = ('.pdf', '.txt', '.md')  # Removed .docx
     
     @classmethod
     def validate(cls):
@@ -33,4 +59,7 @@ class Config:
         if not cls.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        return True
\ No newline at end of file
+        return True
+
+# Shared read-only settings; import this instead of instantiating Config
+CONFIG = Config()
@@ -1,34 +1,67 @@
+import hashlib
+import io
 import os
+import pickle
 import re
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, List, Dict, Any, Optional, Tuple
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-import pypdf
-from sentence_transformers import SentenceTransformer
-import nltk
+import pypdfium2 as pdfium
+import tiktoken
 from tqdm import tqdm
-from src.config import Config
+from src.config import CONFIG
 
-# Download required NLTK data
+# Optional OCR fallback for scanned PDFs without a text layer
 try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
+    import pytesseract
+    # The pip package only wraps the tesseract binary, which may be missing
+    pytesseract.get_tesseract_version()
+    HAS_OCR = True
+except (ImportError, OSError):
+    HAS_OCR = False
+
+# Part of every chunk cache key; bump it whenever extraction, chunking or
+# token counting changes so stale cached chunks are not served
+_PIPELINE_VERSION = 2
+
+# PDFium is not thread-safe, even across documents, and Streamlit runs each
+# session on its own thread - every pdfium call in a process goes through this
+_PDFIUM_LOCK = threading.Lock()
+
+# Sentence splitting patterns, compiled once at import
+_WHITESPACE_RE = re.compile(r'\s+')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+
+# Load the BPE tables once per process rather than once per chunk
+try:
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
 
 class TextChunk:
     """Represents a chunk of text with metadata"""
-    def __init__(self, content: str, metadata: Dict[str, Any]):
+    def __init__(self, content: str, metadata: Dict[str, Any], token_count: Optional[int] = None):
         self.content = content
         self.metadata = metadata
-        self.token_count = self._count_tokens(content)
+        self.token_count = token_count if token_count is not None else self._count_tokens(content)
     
-    def _count_tokens(self, text: str) -> int:
+    @staticmethod
+    def _count_tokens(text: str) -> int:
         """Count tokens using tiktoken"""
-        try:
-            encoding = tiktoken.get_encoding("cl100k_base")
-            return len(encoding.encode(text))
-        except:
+        if _ENCODING is None:
             # Fallback to word count * 1.3 as rough estimate
             return int(len(text.split()) * 1.3)
+        # Documents about LLMs can contain literal "<|endoftext|>"; count it as plain text
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    
+    @staticmethod
+    def _count_tokens_batch(texts: List[str]) -> List[int]:
+        """Count tokens for many texts in one call; tiktoken encodes them on parallel threads"""
+        if _ENCODING is None:
+            return [TextChunk._count_tokens(text) for text in texts]
+        encoded = _ENCODING.encode_batch(texts, num_threads=os.cpu_count() or 8, disallowed_special=())
+        return [len(tokens) for tokens in encoded]
     
     def __repr__(self):
         return f"TextChunk(tokens={self.token_count}, source={self.metadata.get('source', 'unknown')})"
@@ -37,7 +70,7 @@ class DocumentProcessor:
     """Handles document loading, parsing, and chunking using LangChain"""
     
     def __init__(self):
-        self.config = Config()
+        self.config = CONFIG
         # Initialize text splitter with sentence awareness
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.config.CHUNK_SIZE,
@@ -47,33 +80,102 @@ class DocumentProcessor:
         )
     
     def process_documents(self, file_paths: List[str]) -> List[TextChunk]:
-        """Process multiple documents and return text chunks"""
+        """Process multiple documents from disk and return text chunks"""
+        files = []
+        for file_path in file_paths:
+            try:
+                with open(file_path, 'rb') as file:
+                    files.append((file_path, file.read()))
+            except OSError as e:
+                print(f"Error processing {file_path}: {str(e)}")
+        
+        return self.process_files(files)
+    
+    def process_files(self, files: List[Tuple[str, bytes]]) -> List[TextChunk]:
+        """Process in-memory (file name, contents) pairs and return text chunks"""
         all_chunks = []
         
         print("Processing documents...")
-        for file_path in tqdm(file_paths, desc="Documents"):
-            try:
-                chunks = self._process_single_document(file_path)
-                all_chunks.extend(chunks)
-            except Exception as e:
-                print(f"Error processing {file_path}: {str(e)}")
-                continue
+        # Re-ingesting unchanged files is served from the chunk cache
+        keys = [self._cache_key(name, data) for name, data in files]
+        results = [self._load_cached_chunks(key) for key in keys]
+        pending = [i for i, chunks in enumerate(results) if chunks is None]
+        pending_files = [files[i] for i in pending]
+        
+        if len(pending_files) <= 1:
+            # Not worth spinning up worker processes for a single file
+            processed = [self._safe_process(name, data) for name, data in pending_files]
+        else:
+            # Extraction and chunking are CPU-bound, so fan out across cores
+            max_workers = min(len(pending_files), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                processed = list(tqdm(
+                    executor.map(_process_document, *zip(*pending_files)),
+                    total=len(pending_files),
+                    desc="Documents"
+                ))
+        
+        for i, chunks in zip(pending, processed):
+            results[i] = chunks
+            self._store_cached_chunks(keys[i], chunks)
+        
+        for chunks in results:
+            all_chunks.extend(chunks)
         
         return all_chunks
     
-    def _process_single_document(self, file_path: str) -> List[TextChunk]:
+    def _cache_key(self, file_name: str, data: bytes) -> str:
+        """Hash file contents together with everything else that shapes its chunks"""
+        hasher = hashlib.sha256(data)
+        hasher.update(os.path.basename(file_name).encode('utf-8'))
+        hasher.update(f"{self.config.CHUNK_SIZE}:{self.config.CHUNK_OVERLAP}".encode('utf-8'))
+        # Chunks extracted without OCR must not be reused once Tesseract is available
+        hasher.update(f"v{_PIPELINE_VERSION}:ocr={HAS_OCR}".encode('utf-8'))
+        return hasher.hexdigest()
+    
+    def _load_cached_chunks(self, key: str) -> Optional[List[TextChunk]]:
+        """Load previously computed chunks, or None on a cache miss"""
+        try:
+            with open(os.path.join(self.config.CHUNK_CACHE_DIR, f"{key}.pkl"), 'rb') as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+    
+    def _store_cached_chunks(self, key: str, chunks: List[TextChunk]):
+        """Persist chunks for a file; failed or empty documents are not cached"""
+        if not chunks:
+            return
+        
+        cache_path = os.path.join(self.config.CHUNK_CACHE_DIR, f"{key}.pkl")
+        try:
+            os.makedirs(self.config.CHUNK_CACHE_DIR, exist_ok=True)
+            with open(f"{cache_path}.tmp", 'wb') as file:
+                pickle.dump(chunks, file)
+            os.replace(f"{cache_path}.tmp", cache_path)
+        except OSError as e:
+            print(f"Could not cache chunks: {str(e)}")
+    
+    def _safe_process(self, file_name: str, data: bytes) -> List[TextChunk]:
+        """Process a single document, logging and skipping it on failure"""
+        try:
+            return self._process_single_document(file_name, data)
+        except Exception as e:
+            print(f"Error processing {file_name}: {str(e)}")
+            return []
+    
+    def _process_single_document(self, file_name: str, data: bytes) -> List[TextChunk]:
         """Process a single document"""
         # Extract text based on file type
-        text = self._extract_text(file_path)
+        text = self._extract_text(file_name, data)
         
         if not text.strip():
             return []
         
         # Create metadata
         metadata = {
-            'source': os.path.basename(file_path),
-            'file_type': os.path.splitext(file_path)[1].lower(),
-            'file_size': os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            'source': os.path.basename(file_name),
+            'file_type': os.path.splitext(file_name)[1].lower(),
+            'file_size': len(data)
         }
         
         # Chunk the text
@@ -81,71 +183,93 @@ class DocumentProcessor:
         
         return chunks
     
-    def _extract_text(self, file_path: str) -> str:
+    def _extract_text(self, file_name: str, data: bytes) -> str:
         """Extract text from different file types"""
-        ext = os.path.splitext(file_path)[1].lower()
+        ext = os.path.splitext(file_name)[1].lower()
         
         if ext == '.pdf':
-            return self._extract_from_pdf(file_path)
+            return self._extract_from_pdf(io.BytesIO(data))
         elif ext == '.docx':
-            return self._extract_from_docx(file_path)
+            return self._extract_from_docx(data)
         elif ext in ['.txt', '.md']:
-            return self._extract_from_text(file_path)
+            return self._extract_from_text(data)
         else:
             raise ValueError(f"Unsupported file type: {ext}")
     
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF using pypdf"""
+    def _extract_from_pdf(self, stream: BinaryIO) -> str:
+        """Extract text from PDF using PDFium, falling back to OCR on pages without a text layer"""
         try:
-            with open(file_path, 'rb') as file:
-                reader = pypdf.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-            return text
+            with _PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(stream)
+                try:
+                    pages = [self._extract_page(pdf[i], i + 1) for i in range(len(pdf))]
+                finally:
+                    # Also closes pages and text pages, so no pdfium handle outlives the lock
+                    pdf.close()
+            return "".join(page_text + "\n" for page_text in pages)
         except Exception as e:
             raise ValueError(f"Error reading PDF: {str(e)}")
     
-    def _extract_from_docx(self, file_path: str) -> str:
+    def _extract_page(self, page, page_number: int) -> str:
+        """Text of one page, OCR'd when the text layer is (nearly) empty; caller holds _PDFIUM_LOCK"""
+        textpage = page.get_textpage()
+        page_text = textpage.get_text_range().replace("\r\n", "\n")
+        textpage.close()
+        if HAS_OCR and len(page_text.strip()) < self.config.OCR_MIN_PAGE_CHARS:
+            # Likely a scanned page - only now pay for rendering + OCR
+            try:
+                page_text = self._ocr_page(page)
+            except Exception as e:
+                # Keep the text layer rather than failing the whole document
+                print(f"OCR failed on page {page_number}: {str(e)}")
+        page.close()
+        return page_text
+    
+    def _ocr_page(self, page) -> str:
+        """Render a PDF page with PDFium and run Tesseract over it"""
+        image = page.render(scale=self.config.OCR_RENDER_DPI / 72).to_pil()
+        return pytesseract.image_to_string(image)
+    
+    def _extract_from_docx(self, data: bytes) -> str:
         """Extract text from DOCX - fallback to simple text reading"""
         try:
             # Since python-docx is not in requirements, treat as text file
-            return self._extract_from_text(file_path)
+            return self._extract_from_text(data)
         except Exception as e:
             raise ValueError(f"Error reading DOCX (treating as text): {str(e)}")
     
-    def _extract_from_text(self, file_path: str) -> str:
+    def _extract_from_text(self, data: bytes) -> str:
         """Extract text from plain text files"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            return data.decode('utf-8')
         except UnicodeDecodeError:
             # Try with different encoding
             try:
-                with open(file_path, 'r', encoding='latin-1') as file:
-                    return file.read()
+                return data.decode('latin-1')
             except Exception as e:
                 raise ValueError(f"Error reading text file: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"Error reading text file: {str(e)}")
     
     def _chunk_text(self, text: str, base_metadata: Dict[str, Any]) -> List[TextChunk]:
         """Chunk text using LangChain's RecursiveCharacterTextSplitter"""
         # Use LangChain's text splitter
-        text_chunks = self.text_splitter.split_text(text)
+        text_chunks = [
+            (i, chunk_text.strip())
+            for i, chunk_text in enumerate(self.text_splitter.split_text(text))
+            if chunk_text.strip()
+        ]
+        
+        # Count tokens for the whole document at once instead of per chunk
+        token_counts = TextChunk._count_tokens_batch([chunk_text for _, chunk_text in text_chunks])
         
         chunks = []
-        for i, chunk_text in enumerate(text_chunks):
-            if not chunk_text.strip():
-                continue
-                
+        for (i, chunk_text), token_count in zip(text_chunks, token_counts):
             metadata = {
                 **base_metadata,
                 'chunk_index': i,
                 'chunk_type': 'text'
             }
             
-            chunk = TextChunk(chunk_text.strip(), metadata)
+            chunk = TextChunk(chunk_text, metadata, token_count)
             chunks.append(chunk)
         
         return chunks
@@ -153,11 +277,10 @@ class DocumentProcessor:
     def _split_into_sentences(self, text: str) -> List[str]:
         """Split text into sentences using regex"""
         # Clean up text
-        text = re.sub(r'\s+', ' ', text)  # Normalize whitespace
+        text = _WHITESPACE_RE.sub(' ', text)  # Normalize whitespace
         
         # Split on sentence endings, but be careful with abbreviations
-        sentence_pattern = r'(?<=[.!?])\s+(?=[A-Z])'
-        sentences = re.split(sentence_pattern, text)
+        sentences = _SENTENCE_END_RE.split(text)
         
         # Filter out very short sentences
         sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
@@ -175,27 +298,14 @@ class DocumentProcessor:
         
         # Build overlap from end of text
         for word in reversed(words):
-            word_tokens = self._count_tokens(word)
+            word_tokens = TextChunk._count_tokens(word)
             if token_count + word_tokens > max_tokens:
                 break
             overlap_words.insert(0, word)
             token_count += word_tokens
         
         return " ".join(overlap_words)
-    
-    def _count_tokens(self, text: str) -> int:
-        """Count tokens in text - simplified character-based estimation"""
-        # Simple estimation: ~4 characters per token
-        return len(text) // 4
-    
-    # Remove unused methods that were replaced by LangChain
-    def _split_into_sentences(self, text: str) -> List[str]:
-        """Split text into sentences using NLTK"""
-        from nltk.tokenize import sent_tokenize
-        return sent_tokenize(text)
-    
-    def _get_overlap_text(self, text: str, max_chars: int) -> str:
-        """Get the last part of text up to max_chars for overlap"""
-        if max_chars <= 0:
-            return ""
-        return text[-max_chars:] if len(text) > max_chars else text
\ No newline at end of file
+
+def _process_document(file_name: str, data: bytes) -> List[TextChunk]:
+    """Worker entry point: builds its own processor so nothing unpicklable crosses processes"""
+    return DocumentProcessor()._safe_process(file_name, data)
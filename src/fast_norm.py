@@ -0,0 +1,52 @@
+import math
+import numpy as np
+
+# Numba is optional; without it normalization falls back to NumPy
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+if HAS_NUMBA:
+    @njit(fastmath=True, cache=True)
+    def _normalize_1d(x):
+        """Scale a single vector to unit length in one fused pass"""
+        s = 0.0
+        for j in range(x.shape[0]):
+            s += x[j] * x[j]
+        inv = 1.0 / (math.sqrt(s) + 1e-12)
+        for j in range(x.shape[0]):
+            x[j] *= inv
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _normalize_2d(x):
+        """Scale each row to unit length, rows spread across cores"""
+        for i in prange(x.shape[0]):
+            s = 0.0
+            for j in range(x.shape[1]):
+                s += x[i, j] * x[i, j]
+            inv = 1.0 / (math.sqrt(s) + 1e-12)
+            for j in range(x.shape[1]):
+                x[i, j] *= inv
+
+def normalize_rows(x: np.ndarray):
+    """L2-normalize a float32 vector or matrix of row vectors in place"""
+    if x.ndim == 2 and x.shape[0] == 1:
+        # A single query row: skip the parallel kernel launch / norms temporary
+        x = x[0]
+    
+    if HAS_NUMBA:
+        if x.ndim == 1:
+            _normalize_1d(x)
+        else:
+            _normalize_2d(x)
+        return
+    
+    if x.ndim == 1:
+        x *= 1.0 / (math.sqrt(float(np.dot(x, x))) + 1e-12)
+        return
+
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    x /= norms
@@ -1,88 +1,651 @@
+import asyncio
+import functools
+import hashlib
+import json
+import math
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
 import numpy as np
-import faiss
-from typing import List, Tuple, Dict, Any
-from openai import OpenAI
+from typing import AsyncIterator, List, Tuple, Dict, Any, Optional, Sequence, Set
+from openai import AsyncOpenAI
 from tqdm import tqdm
-from src.config import Config
+from src import fast_norm
+from src.async_runner import iter_sync, run_sync
+from src.config import CONFIG
 from src.document_processor import TextChunk
 
+# FAISS is preferred; without it search falls back to NumPy matrix products
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+def normalize_rows(embeddings: np.ndarray):
+    """L2-normalize a contiguous float32 matrix in place"""
+    if faiss is not None:
+        faiss.normalize_L2(embeddings)
+    else:
+        fast_norm.normalize_rows(embeddings)
+
+def _unique_path(directory: str, prefix: str, suffix: str) -> str:
+    """Reserve a fresh file name in directory"""
+    fd, path = tempfile.mkstemp(dir=directory, prefix=prefix, suffix=suffix)
+    os.close(fd)
+    return path
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    """Read a JSON file, or None if it is missing or unreadable"""
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def _write_json_atomically(path: str, data: Dict[str, Any]):
+    """Write JSON to a unique temp file and rename it over path"""
+    tmp_path = _unique_path(os.path.dirname(path), ".tmp-", ".json")
+    try:
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.remove(tmp_path)
+        raise
+
+@functools.lru_cache(maxsize=None)
+def _load_local_model(model_name: str):
+    """Load a sentence-transformers model once per process (imported lazily, it pulls in torch)"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+class NumpyIndex:
+    """Exact inner-product index over one contiguous float32 matrix (FAISS-compatible subset).
+    
+    Row i holds the vector with id i, so ids need no separate array; they are
+    expected to be dense (0..N-1), as chunk positions are.
+    """
+    
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.ntotal = 0
+        self.is_trained = True
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+    
+    def add(self, embeddings: np.ndarray):
+        """Append rows with the next free ids"""
+        self.add_with_ids(embeddings, np.arange(self.ntotal, self.ntotal + len(embeddings)))
+    
+    def add_with_ids(self, embeddings: np.ndarray, ids: np.ndarray):
+        """Store each row at its id, growing the backing matrix geometrically to amortize copies"""
+        if len(ids) == 0:
+            return
+        needed = max(self.ntotal, int(ids.max()) + 1)
+        if needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors)), self.dim), dtype=np.float32)
+            grown[:self.ntotal] = self._vectors[:self.ntotal]
+            self._vectors = grown
+        self._vectors[ids] = embeddings
+        self.ntotal = needed
+    
+    def search(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Score all vectors with a single matrix product; pads with -1 like FAISS"""
+        scores = queries @ self._vectors[:self.ntotal].T
+        k = min(top_k, self.ntotal)
+        
+        # O(N) selection of the top k, then sort just those k
+        if k < self.ntotal:
+            indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            indices = np.broadcast_to(np.arange(self.ntotal), scores.shape)
+        top_scores = np.take_along_axis(scores, indices, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        
+        out_scores = np.full((len(queries), top_k), -np.inf, dtype=np.float32)
+        out_indices = np.full((len(queries), top_k), -1, dtype=np.int64)
+        out_scores[:, :k] = np.take_along_axis(top_scores, order, axis=1)
+        out_indices[:, :k] = np.take_along_axis(indices, order, axis=1)
+        return out_scores, out_indices
+    
+    def save(self, path: str):
+        """Write the stored vectors as a .npy file"""
+        with open(path, 'wb') as file:
+            np.save(file, self._vectors[:self.ntotal])
+    
+    @classmethod
+    def load(cls, path: str) -> "NumpyIndex":
+        """Memory-map vectors written by save(); the first add() copies them into RAM"""
+        vectors = np.load(path, mmap_mode='r')
+        index = cls(vectors.shape[1])
+        index._vectors = vectors
+        index.ntotal = len(vectors)
+        return index
+
+class ChunksView(Sequence):
+    """Read-only, zero-copy view over a chunk list"""
+    
+    __slots__ = ('_chunks',)
+    
+    def __init__(self, chunks: List[TextChunk]):
+        self._chunks = chunks
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ChunksView(self._chunks[index])
+        return self._chunks[index]
+    
+    def __len__(self) -> int:
+        return len(self._chunks)
+    
+    def __iter__(self):
+        return iter(self._chunks)
+    
+    def __repr__(self) -> str:
+        return f"ChunksView({self._chunks!r})"
+
 class VectorStore:
     """FAISS-based vector store for semantic search"""
     
     def __init__(self):
-        self.config = Config()
+        self.config = CONFIG
         self.index = None
         self.chunks: List[TextChunk] = []
-        self.client = OpenAI(api_key=self.config.OPENAI_API_KEY)
+        self.aclient = AsyncOpenAI(api_key=self.config.OPENAI_API_KEY)
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._corpus_hash: Optional[str] = None
+        self._search_queue: Optional[asyncio.Queue] = None
+        self._search_worker: Optional[asyncio.Future] = None
+        self.gpu_res = None
+        # Running totals so get_stats never rescans the corpus
+        self._total_tokens = 0
+        self._sources: Set[str] = set()
         
     def add_chunks(self, chunks: List[TextChunk]):
         """Add text chunks to the vector store"""
         if not chunks:
             return
         
-        self.chunks = chunks
+        # The same corpus was already embedded and saved - reuse it
+        corpus_hash = self._hash_corpus(chunks)
+        if self.load(corpus_hash=corpus_hash):
+            print(f"Loaded persisted index for {len(chunks)} chunks")
+            return
+        
+        self.chunks = []
+        self._reset_stats()
+        self._corpus_hash = corpus_hash
+        self._query_cache.clear()
         print(f"Generating embeddings for {len(chunks)} chunks...")
         
-        # Generate embeddings for all chunks
-        embeddings = self._generate_embeddings([chunk.content for chunk in chunks])
+        # Embeddings are indexed batch by batch as they arrive, so only the
+        # chunk list - not an N x D matrix - stays resident. Each vector's id
+        # is its chunk's position, so batches may land in any order
+        index = self._create_index(len(chunks), self.config.VECTOR_DIM)
+        # Sized from the CPU index - the IVF structure of a GPU copy cannot be extracted
+        ivf = faiss.try_extract_index_ivf(index) if not index.is_trained else None
+        self.index = self._to_gpu(index)
+        texts = [chunk.content for chunk in chunks]
+        token_counts = [chunk.token_count for chunk in chunks]
+        remaining = np.ones(len(chunks), dtype=bool)
         
-        # Create FAISS index
-        self.index = faiss.IndexFlatIP(self.config.VECTOR_DIM)  # Inner product for cosine similarity
+        try:
+            if not self.index.is_trained:
+                # Quantizers and IVF centroids need a representative sample up front
+                sample_size = min(len(chunks), max(self.config.TRAINING_SAMPLE_SIZE, 50 * ivf.nlist if ivf else 0))
+                sample_ids = np.sort(np.random.default_rng(0).choice(len(chunks), sample_size, replace=False))
+                sample = self._generate_embeddings([texts[i] for i in sample_ids], [token_counts[i] for i in sample_ids])
+                normalize_rows(sample)
+                self.index.train(sample)
+                self._index_batch(sample_ids.tolist(), sample)
+                remaining[sample_ids] = False
+            
+            pending = np.flatnonzero(remaining).tolist()
+            batches = iter_sync(self._iter_embeddings([texts[i] for i in pending], [token_counts[i] for i in pending]))
+            for batch_ids, batch in tqdm(batches, desc="Indexing embeddings"):
+                normalize_rows(batch)
+                self._index_batch([pending[i] for i in batch_ids], batch)
+        except Exception as e:
+            self.index = None
+            self.gpu_res = None
+            raise ValueError(f"Error generating embeddings: {str(e)}")
         
-        # Normalize embeddings for cosine similarity
-        embeddings_normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        # Chunks keep their input (document) order; index ids point into it
+        self.chunks = list(chunks)
+        self._track_stats(self.chunks)
         
-        # Add to index
-        self.index.add(embeddings_normalized.astype('float32'))
+        # Persist so the next process start can skip ingestion entirely
+        try:
+            self.save()
+        except OSError as e:
+            print(f"Could not persist vector store: {str(e)}")
+    
+    def _index_batch(self, chunk_ids: List[int], embeddings: np.ndarray):
+        """Add normalized embeddings under their chunks' positions as ids"""
+        self.index.add_with_ids(embeddings, np.asarray(chunk_ids, dtype=np.int64))
+    
+    def _track_stats(self, chunks: List[TextChunk]):
+        """Fold newly stored chunks into the running get_stats totals"""
+        self._total_tokens += sum(chunk.token_count for chunk in chunks)
+        self._sources.update(chunk.metadata.get('source', 'unknown') for chunk in chunks)
+    
+    def _reset_stats(self):
+        """Zero the running get_stats totals"""
+        self._total_tokens = 0
+        self._sources = set()
+    
+    def _create_index(self, num_vectors: int, dim: int):
+        """Create an empty inner-product index sized to the corpus (possibly untrained)"""
+        if faiss is None:
+            return NumpyIndex(dim)
+        
+        # Scalar-quantized storage cuts the bytes scanned per query 2x (fp16) or 4x (8-bit).
+        # Flat and HNSW indexes are wrapped in IDMap2 so vectors can be added under chunk ids
+        if num_vectors < self.config.IVF_MIN_VECTORS:
+            # Exact scan is fastest for small corpora
+            return faiss.index_factory(dim, f"IDMap2,{self.config.VECTOR_ENCODING}", faiss.METRIC_INNER_PRODUCT)
+        
+        if self.config.USE_HNSW and num_vectors < self.config.PQ_MIN_VECTORS:
+            # Graph search visits O(log N) vectors per query and needs no training
+            index = faiss.index_factory(
+                dim, f"IDMap2,HNSW{self.config.HNSW_M},{self.config.VECTOR_ENCODING}", faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            # Cluster the corpus and only scan the nprobe closest clusters per query
+            encoding = self.config.IVF_VECTOR_ENCODING
+            # ~4*sqrt(N) lists, capped so k-means gets its recommended 39 points per centroid
+            nlist = min(int(4 * math.sqrt(num_vectors)), num_vectors // 39)
+            if num_vectors >= self.config.PQ_MIN_VECTORS:
+                # At this scale compress each vector to dim/4 bytes of PQ codes
+                encoding = f"PQ{dim // 4}x8"
+            # An HNSW coarse quantizer keeps centroid lookup cheap when nlist is large;
+            # IVF lists store ids natively, so no IDMap wrapper is needed
+            quantizer = f"IVF{nlist}_HNSW{self.config.HNSW_M}" if self.config.USE_HNSW else f"IVF{nlist}"
+            index = faiss.index_factory(dim, f"{quantizer},{encoding}", faiss.METRIC_INNER_PRODUCT)
+        
+        self._set_search_params(index)
+        return index
+    
+    def _set_search_params(self, index):
+        """Apply build and query-time knobs (nprobe, HNSW ef) to a FAISS index"""
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            ivf.nprobe = self.config.IVF_NPROBE
+            index = faiss.downcast_index(ivf.quantizer)
+        elif isinstance(index, faiss.IndexIDMap):
+            index = faiss.downcast_index(index.index)
+        hnsw = getattr(index, 'hnsw', None)
+        if hnsw is not None:
+            hnsw.efConstruction = self.config.HNSW_EF_CONSTRUCTION
+            hnsw.efSearch = self.config.HNSW_EF_SEARCH
+    
+    def _to_gpu(self, index):
+        """Copy a FAISS index onto the visible GPUs, keeping the CPU index when that is not possible"""
+        self.gpu_res = None
+        if faiss is None or isinstance(index, NumpyIndex) or not self.config.USE_GPU:
+            return index
+        
+        try:
+            num_gpus = faiss.get_num_gpus()
+            if num_gpus == 0:
+                return index
+            # The resources own the device memory, so they must live as long as the index
+            resources = [faiss.StandardGpuResources() for _ in range(num_gpus)]
+            if num_gpus == 1:
+                gpu_index = faiss.index_cpu_to_gpu(resources[0], 0, index)
+            else:
+                gpu_index = faiss.index_cpu_to_gpu_multiple_py(resources, index)
+        except (AttributeError, RuntimeError):
+            # CPU-only FAISS build, or an index type (e.g. HNSW) without a GPU implementation
+            return index
+        
+        self.gpu_res = resources
+        return gpu_index
     
     def search(self, query: str, top_k: int = None) -> List[Tuple[TextChunk, float]]:
         """Search for similar chunks"""
+        return run_sync(self.asearch(query, top_k))
+    
+    async def asearch(self, query: str, top_k: int = None) -> List[Tuple[TextChunk, float]]:
+        """Search for similar chunks from within a running event loop"""
         if self.index is None or len(self.chunks) == 0:
             return []
         
         if top_k is None:
             top_k = self.config.TOP_K_RESULTS
         
-        # Generate query embedding
-        query_embedding = self._generate_embeddings([query])[0]
-        query_embedding_normalized = query_embedding / np.linalg.norm(query_embedding)
+        # Queries from concurrent chat sessions are answered together by the batcher,
+        # which runs only while queries are queued so idle stores hold no task
+        if self._search_queue is None:
+            self._search_queue = asyncio.Queue()
+        future = asyncio.get_running_loop().create_future()
+        self._search_queue.put_nowait((query, top_k, future))
+        if self._search_worker is None or self._search_worker.done():
+            self._search_worker = asyncio.ensure_future(self._batch_searches())
+        return await future
+    
+    async def _batch_searches(self):
+        """Collect queries arriving within QUERY_BATCH_WINDOW and answer them with one search_batch call"""
+        while not self._search_queue.empty():
+            await asyncio.sleep(self.config.QUERY_BATCH_WINDOW)
+            pending = []
+            while not self._search_queue.empty():
+                pending.append(self._search_queue.get_nowait())
+            
+            # Search once for the largest k; hits are sorted, so each caller takes a prefix
+            queries = [query for query, _, _ in pending]
+            try:
+                results = await self.search_batch(queries, max(top_k for _, top_k, _ in pending))
+            except Exception as e:
+                for _, _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, top_k, future), hits in zip(pending, results):
+                if not future.done():
+                    future.set_result(hits[:top_k])
+    
+    async def search_batch(self, queries: List[str], top_k: int = None) -> List[List[Tuple[TextChunk, float]]]:
+        """Search for several queries with one embedding call and one index pass"""
+        if self.index is None or len(self.chunks) == 0:
+            return [[] for _ in queries]
+        
+        if top_k is None:
+            top_k = self.config.TOP_K_RESULTS
+        
+        # Generate query embeddings
+        query_embeddings = await self._embed_queries(queries)
         
         # Search
-        scores, indices = self.index.search(
-            query_embedding_normalized.reshape(1, -1).astype('float32'), 
-            top_k
-        )
+        scores, indices = self.index.search(query_embeddings, top_k)
         
-        # Return results with similarity scores
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < len(self.chunks) and score > self.config.SIMILARITY_THRESHOLD:
-                results.append((self.chunks[idx], float(score)))
+        # Drop padding ids and weak matches in one vectorized pass
+        keep = (indices >= 0) & (indices < len(self.chunks)) & (scores > self.config.SIMILARITY_THRESHOLD)
         
-        return results
+        # Return results with similarity scores, one list per query
+        return [
+            [
+                (self.chunks[idx], score)
+                for idx, score in zip(indices[row][keep[row]].tolist(), scores[row][keep[row]].tolist())
+            ]
+            for row in range(len(queries))
+        ]
     
-    def _generate_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Generate embeddings using OpenAI API with progress tracking"""
+    async def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed and normalize search queries as an (nq, D) matrix, reusing results for repeated questions"""
+        keys = [hashlib.blake2b(query.strip().lower().encode('utf-8'), digest_size=16).hexdigest() for query in queries]
+        
+        vectors: Dict[str, np.ndarray] = {}
+        for key in keys:
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                self._query_cache.move_to_end(key)
+                vectors[key] = cached
+        
+        # Everything not cached goes out in a single embeddings request
+        missing: Dict[str, str] = {}
+        for key, query in zip(keys, queries):
+            if key not in vectors:
+                missing.setdefault(key, query)
+        if missing:
+            embeddings = await self._embed_batches(list(missing.values()))
+            normalize_rows(embeddings)
+            embeddings.flags.writeable = False  # rows are shared by every hit on their key
+            for key, row in zip(missing, embeddings):
+                vectors[key] = row
+                self._query_cache[key] = row
+            while len(self._query_cache) > self.config.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        
+        if len(keys) == 1:
+            # Interactive chat searches one query at a time; a (1, D) view avoids a copy
+            return vectors[keys[0]][np.newaxis]
+        return np.stack([vectors[key] for key in keys])
+    
+    def _generate_embeddings(self, texts: List[str], token_counts: Optional[List[int]] = None) -> np.ndarray:
+        """Generate embeddings for all texts as one float32 matrix"""
+        return run_sync(self._embed_batches(texts, token_counts))
+    
+    async def _embed_batches(self, texts: List[str], token_counts: Optional[List[int]] = None) -> np.ndarray:
+        """Collect streamed embedding batches into one float32 matrix in input order"""
         try:
-            # Process in batches to avoid rate limits
-            batch_size = 100
-            all_embeddings = []
-            
-            for i in tqdm(range(0, len(texts), batch_size), desc="Generating embeddings"):
-                batch = texts[i:i + batch_size]
-                response = self.client.embeddings.create(
-                    model=self.config.EMBEDDING_MODEL,
-                    input=batch
-                )
-                
-                batch_embeddings = [data.embedding for data in response.data]
-                all_embeddings.extend(batch_embeddings)
+            # Output buffer, allocated once the first batch reveals the dimension
+            all_embeddings = None
+            async for batch_ids, batch in self._iter_embeddings(texts, token_counts):
+                if all_embeddings is None:
+                    all_embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+                all_embeddings[batch_ids] = batch
             
-            return np.array(all_embeddings)
+            if all_embeddings is None:
+                return np.empty((0, self.config.VECTOR_DIM), dtype=np.float32)
+            return all_embeddings
             
         except Exception as e:
             raise ValueError(f"Error generating embeddings: {str(e)}")
     
+    async def _iter_embeddings(
+        self, texts: List[str], token_counts: Optional[List[int]] = None
+    ) -> AsyncIterator[Tuple[List[int], np.ndarray]]:
+        """Yield (positions in texts, float32 embeddings) for each batch as soon as it is ready"""
+        # Embed each distinct text once (boilerplate repeats across documents)
+        # and hand every duplicate position a copy of its vector
+        members: Dict[bytes, List[int]] = {}
+        for i, text in enumerate(texts):
+            members.setdefault(hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest(), []).append(i)
+        groups = list(members.values())
+        unique_texts = [texts[group[0]] for group in groups]
+        unique_counts = [token_counts[group[0]] for group in groups] if token_counts is not None else None
+        
+        async for unique_ids, batch in self._iter_unique_embeddings(unique_texts, unique_counts):
+            positions = [i for u in unique_ids for i in groups[u]]
+            if len(positions) != len(unique_ids):
+                batch = np.repeat(batch, [len(groups[u]) for u in unique_ids], axis=0)
+            yield positions, batch
+    
+    async def _iter_unique_embeddings(
+        self, texts: List[str], token_counts: Optional[List[int]] = None
+    ) -> AsyncIterator[Tuple[List[int], np.ndarray]]:
+        """Batch texts and embed them, yielding each batch as soon as it is ready"""
+        if token_counts is None:
+            token_counts = TextChunk._count_tokens_batch(texts)
+        batches = self._pack_batches(token_counts)
+        
+        if self.config.EMBEDDING_BACKEND == "local":
+            # The local model already uses every core, so batches run one after another
+            for batch_ids in batches:
+                yield batch_ids, await self._embed_locally([texts[j] for j in batch_ids])
+            return
+        
+        semaphore = asyncio.Semaphore(self.config.EMBEDDING_CONCURRENCY)
+        
+        async def embed_batch(batch_ids: List[int]) -> Tuple[List[int], np.ndarray]:
+            async with semaphore:
+                response = await self.aclient.embeddings.create(
+                    model=self.config.EMBEDDING_MODEL,
+                    input=[texts[j] for j in batch_ids],
+                    # Server-side truncation: smaller vectors shrink the index and every scan
+                    dimensions=self.config.VECTOR_DIM
+                )
+            return batch_ids, np.asarray([data.embedding for data in response.data], dtype=np.float32)
+        
+        tasks = [asyncio.ensure_future(embed_batch(batch_ids)) for batch_ids in batches]
+        try:
+            for next_batch in asyncio.as_completed(tasks):
+                yield await next_batch
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _pack_batches(self, token_counts: List[int]) -> List[List[int]]:
+        """Greedily group text positions into batches that fit the per-request token and input caps"""
+        # Longest-first, so each batch holds similar-length inputs; callers put
+        # results back via the positions
+        order = np.argsort(-np.asarray(token_counts), kind='stable').tolist()
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens = 0
+        for i in order:
+            if batch and (batch_tokens + token_counts[i] > self.config.EMBEDDING_BATCH_TOKENS
+                          or len(batch) == self.config.EMBEDDING_BATCH_SIZE):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(i)
+            batch_tokens += token_counts[i]
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    async def _embed_locally(self, texts: List[str]) -> np.ndarray:
+        """Embed texts with the local sentence-transformers model, off the event loop thread"""
+        model = _load_local_model(self.config.LOCAL_EMBEDDING_MODEL)
+        encode = functools.partial(
+            model.encode,
+            texts,
+            batch_size=self.config.LOCAL_EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        embeddings = await asyncio.get_running_loop().run_in_executor(None, encode)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    @staticmethod
+    def _hash_corpus(chunks: List[TextChunk]) -> str:
+        """Order-independent fingerprint of the chunk contents and metadata"""
+        # Metadata is included so the same text under a new file name is not
+        # answered with the old source
+        chunk_hashes = sorted(
+            hashlib.blake2b(
+                chunk.content.encode('utf-8') + b"\0" +
+                json.dumps(chunk.metadata, sort_keys=True, default=str).encode('utf-8'),
+                digest_size=16
+            ).digest()
+            for chunk in chunks
+        )
+        return hashlib.blake2b(b"".join(chunk_hashes), digest_size=16).hexdigest()
+    
+    def _index_settings(self) -> Dict[str, Any]:
+        """Build-time settings baked into a saved index; query-time ones are reapplied on load"""
+        return {
+            'vector_encoding': self.config.VECTOR_ENCODING,
+            'ivf_vector_encoding': self.config.IVF_VECTOR_ENCODING,
+            'ivf_min_vectors': self.config.IVF_MIN_VECTORS,
+            'pq_min_vectors': self.config.PQ_MIN_VECTORS,
+            'training_sample_size': self.config.TRAINING_SAMPLE_SIZE,
+            'use_hnsw': self.config.USE_HNSW,
+            'hnsw_m': self.config.HNSW_M,
+            'hnsw_ef_construction': self.config.HNSW_EF_CONSTRUCTION
+        }
+    
+    def _embedding_model(self) -> str:
+        """Name of the model whose vectors this store holds"""
+        if self.config.EMBEDDING_BACKEND == "local":
+            return self.config.LOCAL_EMBEDDING_MODEL
+        return self.config.EMBEDDING_MODEL
+    
+    def save(self, directory: str = None):
+        """Write the index, chunks and build metadata under a directory named for the corpus"""
+        directory = directory or self.config.INDEX_DIR
+        store_dir = os.path.join(directory, self._corpus_hash)
+        os.makedirs(store_dir, exist_ok=True)
+        meta_path = os.path.join(store_dir, "meta.json")
+        
+        # Data files get fresh unique names, so concurrent saves (several sessions
+        # ingesting at once) and stores still memory-mapping older files never
+        # see a file change underneath them
+        if isinstance(self.index, NumpyIndex):
+            index_path = _unique_path(store_dir, "index-", ".npy")
+            self.index.save(index_path)
+        else:
+            index_path = _unique_path(store_dir, "index-", ".faiss")
+            index = faiss.index_gpu_to_cpu(self.index) if self.gpu_res else self.index
+            faiss.write_index(index, index_path)
+        
+        chunks_path = _unique_path(store_dir, "chunks-", ".pkl")
+        with open(chunks_path, 'wb') as file:
+            pickle.dump(self.chunks, file)
+        
+        previous = _read_json(meta_path)
+        
+        # Swapped in last and atomically: meta.json always names one consistent
+        # index/chunks pair, and a store only counts as saved once it exists
+        _write_json_atomically(meta_path, {
+            'hash': self._corpus_hash,
+            'model': self._embedding_model(),
+            'dim': self.config.VECTOR_DIM,
+            'index_settings': self._index_settings(),
+            'index_file': os.path.basename(index_path),
+            'chunks_file': os.path.basename(chunks_path)
+        })
+        _write_json_atomically(os.path.join(directory, "latest.json"), {'hash': self._corpus_hash})
+        
+        # The pair this save superseded; open mappings keep their data alive
+        if previous:
+            for name in (previous.get('index_file'), previous.get('chunks_file')):
+                if name:
+                    try:
+                        os.remove(os.path.join(store_dir, name))
+                    except OSError:
+                        pass
+    
+    def load(self, directory: str = None, corpus_hash: str = None) -> bool:
+        """Load a store written by save(), memory-mapping the index where possible.
+        
+        Loads the store for corpus_hash, or the most recently saved one when it
+        is None. Returns False if nothing usable is saved: no store, one built
+        with a different embedding model or index settings, or files that do
+        not hold the expected corpus.
+        """
+        directory = directory or self.config.INDEX_DIR
+        
+        if corpus_hash is None:
+            corpus_hash = (_read_json(os.path.join(directory, "latest.json")) or {}).get('hash')
+            if not corpus_hash:
+                return False
+        store_dir = os.path.join(directory, corpus_hash)
+        
+        meta = _read_json(os.path.join(store_dir, "meta.json"))
+        if meta is None:
+            return False
+        if meta.get('model') != self._embedding_model() or meta.get('dim') != self.config.VECTOR_DIM:
+            return False
+        if meta.get('index_settings') != self._index_settings():
+            return False
+        if meta.get('hash') != corpus_hash or not meta.get('index_file') or not meta.get('chunks_file'):
+            return False
+        
+        index_path = os.path.join(store_dir, meta['index_file'])
+        try:
+            if index_path.endswith(".npy"):
+                index = NumpyIndex.load(index_path)
+            elif faiss is not None:
+                try:
+                    index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+                except RuntimeError:
+                    # Not every index type supports mmap; read it into memory instead
+                    index = faiss.read_index(index_path)
+                self._set_search_params(index)
+            else:
+                return False
+            
+            with open(os.path.join(store_dir, meta['chunks_file']), 'rb') as file:
+                chunks = pickle.load(file)
+        except (OSError, RuntimeError, pickle.UnpicklingError, EOFError) as e:
+            print(f"Could not load vector store: {str(e)}")
+            return False
+        
+        # Never trust the file names alone: the chunks must really be this corpus
+        if index.ntotal != len(chunks) or self._hash_corpus(chunks) != corpus_hash:
+            return False
+        
+        self.index = self._to_gpu(index)
+        self.chunks = chunks
+        self._reset_stats()
+        self._track_stats(chunks)
+        self._corpus_hash = corpus_hash
+        self._query_cache.clear()
+        return True
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
         if not self.chunks:
@@ -93,23 +656,24 @@ class VectorStore:
                 'avg_tokens_per_chunk': 0
             }
         
-        # Count unique documents
-        sources = set(chunk.metadata.get('source', 'unknown') for chunk in self.chunks)
-        total_tokens = sum(chunk.token_count for chunk in self.chunks)
-        
         return {
-            'num_documents': len(sources),
+            'num_documents': len(self._sources),
             'num_chunks': len(self.chunks),
-            'total_tokens': total_tokens,
-            'avg_tokens_per_chunk': total_tokens / len(self.chunks) if self.chunks else 0,
-            'sources': list(sources)
+            'total_tokens': self._total_tokens,
+            'avg_tokens_per_chunk': self._total_tokens / len(self.chunks),
+            'sources': list(self._sources)
         }
     
-    def get_all_chunks(self) -> List[TextChunk]:
-        """Get all stored chunks"""
-        return self.chunks.copy()
+    def get_all_chunks(self, copy: bool = False) -> Sequence[TextChunk]:
+        """Get all stored chunks as a read-only view (no copy), or a mutable list when copy=True"""
+        if copy:
+            return self.chunks.copy()
+        return ChunksView(self.chunks)
     
     def clear(self):
         """Clear the vector store"""
         self.index = None
-        self.chunks = []
\ No newline at end of file
+        self.gpu_res = None
+        self.chunks = []
+        self._reset_stats()
+        self._query_cache.clear()
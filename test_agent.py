@@ -15,6 +15,7 @@ from src.document_processor import DocumentProcessor
 from src.vector_store import VectorStore
 from src.chat_agent import ChatAgent
 from src.config import Config
+from src.async_runner import run_sync
 
 def create_sample_document():
     """Create a sample document for testing"""
@@ -109,13 +110,13 @@ def test_system():
         
         for question in test_questions:
             print(f"\n❓ Question: {question}")
-            response = agent.get_response(question, mode="interview")
+            response = run_sync(agent.get_response(question, mode="interview"))
             print(f"✅ Response: {response[:100]}...")
         
         # Test different modes
         print(f"\n🎭 Testing different modes...")
         for mode in ["interview", "story", "fast", "humble_brag"]:
-            response = agent.get_response("What projects are you proud of?", mode=mode)
+            response = run_sync(agent.get_response("What projects are you proud of?", mode=mode))
             print(f"✅ Mode '{mode}': {len(response)} chars")
         
         print("\n🎉 All tests passed!")
@@ -0,0 +1,136 @@
+import dataclasses
+import pytest
+import src.document_processor as document_processor
+from src.config import CONFIG
+from src.document_processor import DocumentProcessor, TextChunk
+
+def make_pdf(page_texts: list) -> bytes:
+    """Minimal PDF with one Helvetica text line per page; an empty string gives a blank page"""
+    page_ids = [4 + 2 * i for i in range(len(page_texts))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % i for i in page_ids) + b"] /Count %d >>" % len(page_ids),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id, text in zip(page_ids, page_texts):
+        stream = b"BT /F1 12 Tf 20 100 Td (" + text.encode('latin-1') + b") Tj ET" if text else b""
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 300 200] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_id + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+@pytest.fixture
+def processor(tmp_path):
+    """DocumentProcessor caching chunks in a temporary directory"""
+    processor = DocumentProcessor()
+    processor.config = dataclasses.replace(CONFIG, CHUNK_CACHE_DIR=str(tmp_path))
+    return processor
+
+def test_process_files_chunks_in_memory_uploads(processor):
+    chunks = processor.process_files([("notes.txt", b"First paragraph.\n\nSecond paragraph.")])
+    
+    assert [chunk.content for chunk in chunks] == ["First paragraph.\n\nSecond paragraph."]
+    assert chunks[0].metadata['source'] == "notes.txt"
+    assert chunks[0].token_count > 0
+
+def test_cached_files_are_not_processed_again(processor, monkeypatch):
+    files = [("notes.txt", b"Some text worth caching.")]
+    first = processor.process_files(files)
+    
+    def fail(file_name, data):
+        raise AssertionError("cache miss")
+    monkeypatch.setattr(processor, "_safe_process", fail)
+    second = processor.process_files(files)
+    
+    assert [chunk.content for chunk in second] == [chunk.content for chunk in first]
+
+def test_changed_files_miss_the_cache(processor):
+    processor.process_files([("notes.txt", b"Old text.")])
+    chunks = processor.process_files([("notes.txt", b"New text.")])
+    
+    assert [chunk.content for chunk in chunks] == ["New text."]
+
+def test_cache_key_covers_ocr_availability_and_pipeline_version(processor, monkeypatch):
+    key = processor._cache_key("cv.pdf", b"data")
+    
+    monkeypatch.setattr(document_processor, "HAS_OCR", not document_processor.HAS_OCR)
+    ocr_key = processor._cache_key("cv.pdf", b"data")
+    monkeypatch.setattr(document_processor, "_PIPELINE_VERSION", document_processor._PIPELINE_VERSION + 1)
+    
+    assert len({key, ocr_key, processor._cache_key("cv.pdf", b"data")}) == 3
+
+def test_several_files_are_processed_in_worker_processes(processor, monkeypatch):
+    pools = []
+    
+    class RecordingPool(document_processor.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+    monkeypatch.setattr(document_processor, "ProcessPoolExecutor", RecordingPool)
+    
+    files = [(f"doc{i}.txt", f"Document number {i}.".encode('utf-8')) for i in range(3)]
+    chunks = processor.process_files(files)
+    
+    assert len(pools) == 1
+    assert [chunk.metadata['source'] for chunk in chunks] == ["doc0.txt", "doc1.txt", "doc2.txt"]
+
+def test_pdf_text_layer_is_extracted(processor):
+    chunks = processor.process_files([("cv.pdf", make_pdf(["Senior engineer with Python experience"]))])
+    
+    assert "Senior engineer with Python experience" in chunks[0].content
+
+def test_ocr_runs_only_on_pages_without_text(processor, monkeypatch):
+    ocr_pages = []
+    
+    def fake_ocr(page):
+        ocr_pages.append(page)
+        return "Scanned page text"
+    monkeypatch.setattr(document_processor, "HAS_OCR", True)
+    monkeypatch.setattr(processor, "_ocr_page", fake_ocr)
+    
+    chunks = processor.process_files([("cv.pdf", make_pdf(["Text layer page content", ""]))])
+    
+    assert len(ocr_pages) == 1
+    assert "Text layer page content" in chunks[0].content
+    assert "Scanned page text" in chunks[0].content
+
+def test_ocr_failure_keeps_the_rest_of_the_pdf(processor, monkeypatch):
+    def failing_ocr(page):
+        raise RuntimeError("tesseract is not installed")
+    monkeypatch.setattr(document_processor, "HAS_OCR", True)
+    monkeypatch.setattr(processor, "_ocr_page", failing_ocr)
+    
+    chunks = processor.process_files([("cv.pdf", make_pdf(["Text layer page content", ""]))])
+    
+    assert len(chunks) == 1
+    assert "Text layer page content" in chunks[0].content
+
+class StrictEncoding:
+    """Mimics tiktoken's default of rejecting special-token text unless explicitly allowed"""
+    
+    def encode(self, text, disallowed_special="all"):
+        if disallowed_special == "all" and "<|endoftext|>" in text:
+            raise ValueError("Encountered text corresponding to disallowed special token")
+        return text.split()
+    
+    def encode_batch(self, texts, num_threads=8, disallowed_special="all"):
+        return [self.encode(text, disallowed_special=disallowed_special) for text in texts]
+
+def test_special_token_text_is_counted_as_plain_text(monkeypatch):
+    monkeypatch.setattr(document_processor, "_ENCODING", StrictEncoding())
+    text = "GPT models end documents with <|endoftext|> markers"
+    
+    assert TextChunk(text, {}).token_count == len(text.split())
+    assert TextChunk._count_tokens_batch([text, "plain"]) == [len(text.split()), 1]
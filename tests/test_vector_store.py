@@ -0,0 +1,206 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import shutil
+import threading
+import types
+import numpy as np
+import pytest
+import src.vector_store as vector_store
+from src.config import CONFIG
+from src.document_processor import TextChunk
+from src.vector_store import NumpyIndex, VectorStore
+
+DIM = 32
+
+def fake_embedding(text: str) -> list:
+    """Deterministic pseudo-random vector per text, so each chunk is its own nearest neighbour"""
+    seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+    return np.random.default_rng(seed).standard_normal(DIM).tolist()
+
+class FakeEmbeddings:
+    """Stand-in for aclient.embeddings; earlier requests finish later, so batches complete out of order"""
+    
+    def __init__(self):
+        self.requests = []
+        self.completed = []
+    
+    async def create(self, model, input, **kwargs):
+        request_id = len(self.requests)
+        self.requests.append(list(input))
+        await asyncio.sleep(0.002 * (8 - request_id % 8))
+        self.completed.append(request_id)
+        return types.SimpleNamespace(data=[types.SimpleNamespace(embedding=fake_embedding(text)) for text in input])
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch):
+    """Build VectorStores on the OpenAI backend with a fake client and a temporary index directory"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    
+    def factory(**overrides):
+        store = VectorStore()
+        store.config = dataclasses.replace(
+            CONFIG, EMBEDDING_BACKEND="openai", VECTOR_DIM=DIM, INDEX_DIR=str(tmp_path), USE_GPU=False, **overrides
+        )
+        store.aclient = types.SimpleNamespace(embeddings=FakeEmbeddings())
+        return store
+    
+    return factory
+
+@pytest.fixture(params=["faiss", "numpy"])
+def index_backend(request, monkeypatch):
+    """Run a test against FAISS (when installed) and the NumPy fallback"""
+    if request.param == "faiss" and vector_store.faiss is None:
+        pytest.skip("faiss not installed")
+    if request.param == "numpy":
+        monkeypatch.setattr(vector_store, "faiss", None)
+    return request.param
+
+def make_chunks(count: int) -> list:
+    """Chunks of varied length spread over three sources"""
+    return [TextChunk(f"chunk {i} " * (1 + i % 5), {'source': f"doc{i % 3}.txt"}) for i in range(count)]
+
+def test_search_finds_each_chunk_when_batches_complete_out_of_order(make_store, index_backend):
+    store = make_store(EMBEDDING_BATCH_TOKENS=40)
+    chunks = make_chunks(60)
+    store.add_chunks(chunks)
+    
+    embeddings = store.aclient.embeddings
+    assert len(embeddings.requests) > 1
+    assert embeddings.completed != sorted(embeddings.completed)
+    assert store.index.ntotal == len(store.chunks) == len(chunks)
+    # Stored chunks keep input order regardless of which batch finished first
+    assert all(stored is chunk for stored, chunk in zip(store.chunks, chunks))
+    for chunk in chunks:
+        results = store.search(chunk.content, top_k=1)
+        assert results[0][0] is chunk
+
+def test_duplicate_texts_are_embedded_once_but_indexed_per_chunk(make_store, index_backend):
+    store = make_store()
+    chunks = [TextChunk(text, {'source': f"doc{i}.txt"}) for i, text in enumerate(["a b", "c d", "a b", "e f", "a b", "c d"])]
+    store.add_chunks(chunks)
+    
+    sent = [text for request in store.aclient.embeddings.requests for text in request]
+    assert sorted(sent) == ["a b", "c d", "e f"]
+    assert store.index.ntotal == len(chunks)
+    assert all(stored is chunk for stored, chunk in zip(store.chunks, chunks))
+    
+    hits = store.search("a b", top_k=len(chunks))
+    assert {hit.metadata['source'] for hit, _ in hits} == {"doc0.txt", "doc2.txt", "doc4.txt"}
+
+def test_pack_batches_respects_token_and_size_limits(make_store):
+    store = make_store(EMBEDDING_BATCH_TOKENS=100, EMBEDDING_BATCH_SIZE=4)
+    token_counts = np.random.default_rng(0).integers(1, 150, size=200).tolist()
+    batches = store._pack_batches(token_counts)
+    
+    assert sorted(i for batch in batches for i in batch) == list(range(len(token_counts)))
+    for batch in batches:
+        assert len(batch) <= 4
+        # A single over-budget text still has to go out on its own
+        assert len(batch) == 1 or sum(token_counts[i] for i in batch) <= 100
+
+def test_numpy_index_top_k_matches_full_sort():
+    rng = np.random.default_rng(1)
+    index = NumpyIndex(DIM)
+    vectors = rng.standard_normal((500, DIM)).astype(np.float32)
+    index.add(vectors[:200])
+    index.add(vectors[200:])
+    queries = rng.standard_normal((4, DIM)).astype(np.float32)
+    
+    scores, indices = index.search(queries, 10)
+    
+    expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :10]
+    np.testing.assert_array_equal(indices, expected)
+    np.testing.assert_allclose(scores, np.take_along_axis(queries @ vectors.T, expected, axis=1), rtol=1e-5)
+
+def test_numpy_index_add_with_ids_stores_rows_by_id():
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((6, DIM)).astype(np.float32)
+    index = NumpyIndex(DIM)
+    index.add_with_ids(vectors[[4, 5]], np.array([4, 5]))
+    index.add_with_ids(vectors[[0, 2, 1, 3]], np.array([0, 2, 1, 3]))
+    
+    _, indices = index.search(vectors, 1)
+    
+    assert index.ntotal == 6
+    assert indices[:, 0].tolist() == [0, 1, 2, 3, 4, 5]
+
+def test_numpy_index_pads_when_k_exceeds_size():
+    index = NumpyIndex(DIM)
+    index.add(np.eye(3, DIM, dtype=np.float32))
+    
+    scores, indices = index.search(np.eye(1, DIM, dtype=np.float32), 5)
+    
+    assert indices[0, 0] == 0
+    assert sorted(indices[0, :3].tolist()) == [0, 1, 2]
+    assert indices[0, 3:].tolist() == [-1, -1]
+    assert np.isneginf(scores[0, 3:]).all()
+
+def test_save_load_round_trip(make_store, index_backend):
+    store = make_store()
+    chunks = make_chunks(30)
+    store.add_chunks(chunks)
+    
+    loaded = make_store()
+    assert loaded.load()
+    assert [chunk.content for chunk in loaded.chunks] == [chunk.content for chunk in store.chunks]
+    loaded_stats, stats = loaded.get_stats(), store.get_stats()
+    assert sorted(loaded_stats.pop('sources')) == sorted(stats.pop('sources'))
+    assert loaded_stats == stats
+    for chunk in chunks[:5]:
+        assert loaded.search(chunk.content, top_k=1)[0][0].content == chunk.content
+    
+    # Reusing the saved store for the same corpus makes no embedding calls
+    reused = make_store()
+    reused.add_chunks(list(reversed(chunks)))
+    assert reused.aclient.embeddings.requests == []
+    assert reused.index.ntotal == len(chunks)
+
+def test_concurrent_saves_never_mix_corpora(make_store, index_backend):
+    alice, bob = make_store(), make_store()
+    alice.add_chunks([TextChunk(f"alice {i}", {'source': "alice.txt"}) for i in range(20)])
+    bob.add_chunks([TextChunk(f"bob {i}", {'source': "bob.txt"}) for i in range(20)])
+    
+    for _ in range(30):
+        threads = [threading.Thread(target=store.save) for store in (alice, bob)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        for store, name in ((alice, "alice.txt"), (bob, "bob.txt")):
+            loaded = make_store()
+            assert loaded.load(corpus_hash=store._corpus_hash)
+            assert {chunk.metadata['source'] for chunk in loaded.chunks} == {name}
+
+def test_load_rejects_chunks_from_another_corpus(make_store, index_backend, tmp_path):
+    alice, bob = make_store(), make_store()
+    alice.add_chunks([TextChunk(f"alice {i}", {'source': "alice.txt"}) for i in range(5)])
+    bob.add_chunks([TextChunk(f"bob {i}", {'source': "bob.txt"}) for i in range(5)])
+    
+    # Point Alice's metadata at Bob's chunks
+    alice_meta = tmp_path / alice._corpus_hash / "meta.json"
+    bob_meta = json.loads((tmp_path / bob._corpus_hash / "meta.json").read_text())
+    meta = json.loads(alice_meta.read_text())
+    shutil.copy(tmp_path / bob._corpus_hash / bob_meta['chunks_file'], tmp_path / alice._corpus_hash / meta['chunks_file'])
+    
+    assert not make_store().load(corpus_hash=alice._corpus_hash)
+
+def test_get_all_chunks_returns_a_read_only_view(make_store):
+    store = make_store()
+    chunks = make_chunks(5)
+    store.add_chunks(chunks)
+    
+    view = store.get_all_chunks()
+    
+    assert len(view) == 5 and list(view) == chunks and view[-1] is chunks[-1]
+    assert list(view[1:3]) == chunks[1:3]
+    with pytest.raises((AttributeError, TypeError)):
+        view.append(chunks[0])
+    with pytest.raises(TypeError):
+        view[0] = chunks[1]
+    
+    copied = store.get_all_chunks(copy=True)
+    copied.append(chunks[0])
+    assert len(store.chunks) == 5